@@ -0,0 +1,173 @@
+"""asyncio-based DNS server, run on uvloop when it is installed."""
+
+import asyncio
+import secrets
+import struct
+from typing import Optional
+
+from dnslib import DNSRecord
+
+from config import UPSTREAM_DNS_PORT, UPSTREAM_TIMEOUT
+from dns_server import FocusBlockerDNS, _blocking_active_at, _servfail
+
+try:
+    import uvloop
+except ImportError:
+    uvloop = None
+
+HAS_UVLOOP = uvloop is not None
+
+
+class _ClientProtocol(asyncio.DatagramProtocol):
+    """Receives client queries on the listening socket."""
+
+    def __init__(self, server: "AsyncFocusBlockerDNS"):
+        self.server = server
+
+    def datagram_received(self, data: bytes, addr: tuple) -> None:
+        response = self.server.handle_request(data, addr)
+        if response:
+            self.server._send_to_client(response, addr)
+
+
+class _UpstreamProtocol(asyncio.DatagramProtocol):
+    """Receives replies from one upstream DNS server."""
+
+    def __init__(self, server: "AsyncFocusBlockerDNS"):
+        self.server = server
+
+    def datagram_received(self, data: bytes, addr: tuple) -> None:
+        self.server._on_upstream_reply(data)
+
+
+class AsyncFocusBlockerDNS(FocusBlockerDNS):
+    """FocusBlockerDNS running on a single asyncio event loop thread."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._stopped: Optional[asyncio.Event] = None
+        self._transport: Optional[asyncio.DatagramTransport] = None
+        # One connected datagram transport per upstream server
+        self._upstreams: dict[str, asyncio.DatagramTransport] = {}
+        self._upstream_lock: Optional[asyncio.Lock] = None
+        # In-flight upstream queries keyed by the transaction ID we sent
+        self._futures: dict[int, asyncio.Future] = {}
+
+    def forward_upstream(
+        self, data: bytes, addr: tuple, key: tuple[bytes, int, int]
+    ) -> None:
+        """Resolve a query upstream in a task; the reply is sent when it arrives."""
+        self._loop.create_task(self._resolve_upstream(data, addr, key))
+
+    async def _get_upstream(self, server: str) -> asyncio.DatagramTransport:
+        """Get (or lazily create) the transport for an upstream server."""
+        async with self._upstream_lock:
+            transport = self._upstreams.get(server)
+            if transport is None:
+                transport, _ = await self._loop.create_datagram_endpoint(
+                    lambda: _UpstreamProtocol(self),
+                    remote_addr=(server, UPSTREAM_DNS_PORT),
+                )
+                self._upstreams[server] = transport
+            return transport
+
+    async def _resolve_upstream(
+        self, data: bytes, addr: tuple, key: tuple[bytes, int, int]
+    ) -> None:
+        """Try each upstream server in turn and relay the first reply."""
+        while True:
+            txid = secrets.randbits(16)
+            if txid not in self._futures:
+                break
+        packet = bytearray(data)
+        struct.pack_into(">H", packet, 0, txid)
+
+        try:
+            for server in self._get_upstream_dns_servers():
+                # A fresh future per attempt, since a bad reply resolves the last
+                future = self._loop.create_future()
+                self._futures[txid] = future
+                try:
+                    transport = await self._get_upstream(server)
+                    transport.sendto(bytes(packet))
+                    response_data = await asyncio.wait_for(
+                        asyncio.shield(future), UPSTREAM_TIMEOUT
+                    )
+                    response = DNSRecord.parse(response_data)
+                    packed = self._cache_response(key, response)
+                except Exception:
+                    continue  # Unreachable, timed out or malformed reply
+
+                # Restore the client's original transaction ID
+                self._send_to_client(data[:2] + packed[2:], addr)
+                return
+
+            # Every upstream failed, return SERVFAIL
+            self._send_to_client(_servfail(data), addr)
+        except Exception:
+            pass
+        finally:
+            self._futures.pop(txid, None)
+
+    def _on_upstream_reply(self, data: bytes) -> None:
+        """Hand an upstream reply to the task waiting on its transaction ID."""
+        try:
+            future = self._futures.get(struct.unpack_from(">H", data)[0])
+        except struct.error:
+            return
+        if future is not None and not future.done():
+            future.set_result(data)
+
+    def _send_to_client(self, response: bytes, addr: tuple) -> None:
+        """Send a response to a client through the listening transport."""
+        if self._transport is not None:
+            self._transport.sendto(response, addr)
+
+    async def _serve(self) -> None:
+        """Serve queries until stop() is called."""
+        self._loop = asyncio.get_running_loop()
+        self._stopped = asyncio.Event()
+        self._upstream_lock = asyncio.Lock()
+
+        self.socket.setblocking(False)
+        self._transport, _ = await self._loop.create_datagram_endpoint(
+            lambda: _ClientProtocol(self), sock=self.socket
+        )
+        try:
+            await self._stopped.wait()
+        finally:
+            for transport in (self._transport, *self._upstreams.values()):
+                transport.close()
+            self._transport = None
+            self._upstreams.clear()
+            self._futures.clear()
+            self.socket = None
+
+    def start(self):
+        """Start the DNS server on uvloop if available, else the default loop."""
+        self.socket = self._open_socket()
+        self.running = True
+        self._start_network_monitor()
+
+        loop_factory = uvloop.new_event_loop if HAS_UVLOOP else None
+        with asyncio.Runner(loop_factory=loop_factory) as runner:
+            runner.run(self._serve())
+
+    def stop(self):
+        """Stop the DNS server."""
+        self.running = False
+
+        # Stop network monitor if running
+        if self._network_monitor:
+            self._network_monitor.stop()
+            self._network_monitor = None
+
+        # Don't carry a stale blocking state over to the next start()
+        _blocking_active_at.cache_clear()
+
+        if self._loop is not None and self._stopped is not None:
+            try:
+                self._loop.call_soon_threadsafe(self._stopped.set)
+            except RuntimeError:
+                pass  # Loop already closed
@@ -0,0 +1,43 @@
+"""Blocklist matching for DNS query names.
+
+Kept free of dynamic features and fully annotated so it can be compiled
+to a C extension with mypyc (``mypyc blocklist.py``) without changes.
+"""
+
+import functools
+
+from config import BLOCKED_BY_LABEL_COUNT, BLOCKED_LAST_LABELS
+
+
+def is_blocked(domain: str) -> bool:
+    """Check if a domain or any of its parent domains is blocked."""
+    # Remove trailing dot if present (DNS FQDN format)
+    return is_blocked_bytes(domain.rstrip(".").lower().encode())
+
+
+@functools.lru_cache(maxsize=4096)
+def is_blocked_bytes(domain: bytes) -> bool:
+    """
+    Check a lowercase domain name without a trailing dot against the blocklist.
+
+    Operates on the raw bytes of the query name so the server never has
+    to build a str for it.
+    """
+    # Cheap reject: no blocked domain shares this top-level label
+    if domain.rsplit(b".", 1)[-1] not in BLOCKED_LAST_LABELS:
+        return False
+
+    labels: list[bytes] = domain.split(b".")
+    depth: int = len(labels)
+
+    # Probe one suffix per label count present in the blocklist
+    # (e.g., www.youtube.com -> youtube.com, www.youtube.com)
+    n: int
+    shard: frozenset[bytes]
+    for n, shard in BLOCKED_BY_LABEL_COUNT.items():
+        if n > depth:
+            break
+        if b".".join(labels[-n:]) in shard:
+            return True
+
+    return False
@@ -72,6 +72,25 @@ BLOCKED_DOMAINS = [
     "hinge.co",
 ]
 
+# BLOCKED_DOMAINS normalized once at import (lowercase, no trailing dot,
+# duplicates removed) so entries like "YouTube.com." still match queries
+BLOCKED_NORMALIZED = tuple(
+    dict.fromkeys(d.strip().rstrip(".").lower() for d in BLOCKED_DOMAINS)
+)
+
+# Set form of BLOCKED_NORMALIZED (as raw bytes) for O(1) suffix membership checks
+BLOCKED_SET_BYTES = frozenset(d.encode() for d in BLOCKED_NORMALIZED)
+
+# Top-level labels of every blocked domain, used to reject most queries early
+BLOCKED_LAST_LABELS = frozenset(d.rsplit(b".", 1)[-1] for d in BLOCKED_SET_BYTES)
+
+# BLOCKED_SET_BYTES sharded by label count, so a lookup only probes the suffix
+# lengths that actually occur (e.g. 2 for youtube.com, 3 for news.ycombinator.com)
+BLOCKED_BY_LABEL_COUNT = {
+    n: frozenset(d for d in BLOCKED_SET_BYTES if d.count(b".") + 1 == n)
+    for n in sorted({d.count(b".") + 1 for d in BLOCKED_SET_BYTES})
+}
+
 # Time window when sites are ALLOWED (24-hour format)
 # Sites are blocked OUTSIDE this window
 ALLOWED_START_HOUR = 20  # 8:00 PM
@@ -80,10 +99,21 @@ ALLOWED_END_HOUR = 22  # 10:00 PM
 # Upstream DNS server for non-blocked queries
 UPSTREAM_DNS = "8.8.8.8"
 UPSTREAM_DNS_PORT = 53
+UPSTREAM_TIMEOUT = 3.0  # Seconds to wait before falling back to the next server
 
 # Local DNS server settings
 DNS_HOST = "127.0.0.1"  # Listen on localhost only
 DNS_PORT = 53
+SOCKET_BUFFER_SIZE = 8 << 20  # 8 MiB kernel buffers to absorb query bursts
+
+# Number of worker threads handling DNS requests concurrently
+WORKER_THREADS = 32
+
+# Maximum number of upstream responses kept in the in-memory DNS cache
+RESPONSE_CACHE_SIZE = 4096
+
+# Maximum number of packed blocked responses kept for reuse
+BLOCKED_CACHE_SIZE = 2048
 
 # Block response - returns this IP for blocked domains
 BLOCK_IP = "0.0.0.0"
@@ -1,30 +1,177 @@
 """DNS server with blocking capabilities."""
 
+import functools
+import secrets
+import selectors
 import socket
+import struct
 import sys
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 from typing import Optional
 
 from dnslib import DNSRecord, QTYPE, RR, A, AAAA
 
 from config import (
-    BLOCKED_DOMAINS,
     UPSTREAM_DNS,
     UPSTREAM_DNS_PORT,
+    UPSTREAM_TIMEOUT,
     DNS_HOST,
     DNS_PORT,
+    SOCKET_BUFFER_SIZE,
     BLOCK_IP,
     BLOCK_IPV6,
+    RESPONSE_CACHE_SIZE,
+    BLOCKED_CACHE_SIZE,
+    WORKER_THREADS,
 )
+from blocklist import is_blocked, is_blocked_bytes
+from response_sender import ResponseSender
 from scheduler import is_blocking_active
 
 IS_WINDOWS = sys.platform == "win32"
 IS_MACOS = sys.platform == "darwin"
+IS_LINUX = sys.platform.startswith("linux")
+
+# Linux <linux/in.h> values, exposed by the socket module only on newer Pythons
+IP_MTU_DISCOVER = getattr(socket, "IP_MTU_DISCOVER", 10)
+IP_PMTUDISC_DONT = getattr(socket, "IP_PMTUDISC_DONT", 0)
 
 # Only import network monitor on macOS
 if IS_MACOS:
     from network_monitor import NetworkMonitor
 
 
+# Wire-format answer records for blocked A/AAAA queries. The owner name is
+# a compression pointer (0xC00C) back to the question name at offset 12.
+_BLOCKED_ANSWERS = {
+    QTYPE.A: struct.pack(">HHHIH", 0xC00C, QTYPE.A, 1, 60, 4)
+    + socket.inet_aton(BLOCK_IP),
+    QTYPE.AAAA: struct.pack(">HHHIH", 0xC00C, QTYPE.AAAA, 1, 60, 16)
+    + socket.inet_pton(socket.AF_INET6, BLOCK_IPV6),
+}
+
+
+# ASCII uppercase -> lowercase translation table for raw query names
+_LOWER_TABLE = bytes.maketrans(bytes(range(65, 91)), bytes(range(97, 123)))
+
+
+def _peek_question(data: bytes) -> tuple[bytes, int, int]:
+    """
+    Read the question of a raw DNS query without a full dnslib parse.
+
+    Returns (lowercase qname without trailing dot, qtype, offset just past
+    the question). Raises ValueError for packets that need dnslib, such as
+    multiple questions or a compressed question name.
+    """
+    if data[4:6] != b"\x00\x01":  # QDCOUNT must be 1
+        raise ValueError("Expected exactly one question")
+
+    labels = []
+    offset = 12
+    while data[offset]:
+        if data[offset] & 0xC0:
+            raise ValueError("Compressed question name")
+        end = offset + 1 + data[offset]
+        labels.append(data[offset + 1 : end])
+        offset = end
+
+    qend = offset + 5
+    if qend > len(data):
+        raise ValueError("Truncated question")
+
+    qtype = (data[offset + 1] << 8) | data[offset + 2]
+    return b".".join(labels).translate(_LOWER_TABLE), qtype, qend
+
+
+def _servfail(data: bytes) -> bytes:
+    """Build a SERVFAIL reply by patching the header of the raw request."""
+    if len(data) < 12:
+        return b""
+
+    header = bytearray(data[:12])
+    header[2] = 0x80 | (header[2] & 0x79)  # QR=1, keep opcode and RD
+    header[3] = 0x82  # RA=1, RCODE=2 (SERVFAIL)
+    header[6:12] = bytes(6)  # No answer, authority or additional records
+
+    # Echo the question back when it can be located, otherwise drop it
+    try:
+        _, _, qend = _peek_question(data)
+    except (IndexError, ValueError):
+        header[4:6] = b"\x00\x00"
+        return bytes(header)
+
+    return bytes(header) + data[12:qend]
+
+
+@functools.lru_cache(maxsize=1)
+def _blocking_active_at(second_bucket: int) -> bool:
+    """is_blocking_active(), evaluated at most once per monotonic second."""
+    return is_blocking_active()
+
+
+def _min_ttl(response: DNSRecord) -> int:
+    """Get the smallest TTL across answer and authority records (0 if none)."""
+    ttls = [rr.ttl for rr in response.rr] + [rr.ttl for rr in response.auth]
+    return min(ttls) if ttls else 0
+
+
+def _skip_name(data: bytes, offset: int) -> int:
+    """Get the offset just past a (possibly compressed) wire-format name."""
+    while data[offset]:
+        if data[offset] & 0xC0:
+            return offset + 2  # Compression pointer ends the name
+        offset += 1 + data[offset]
+    return offset + 1
+
+
+def _ttl_fields(packed: bytes) -> tuple[tuple[int, int], ...]:
+    """
+    Locate the TTL of every resource record in a packed DNS message.
+
+    Returns (offset, ttl) pairs so cached responses can have their TTLs
+    counted down in place. OPT pseudo-records are skipped, since their TTL
+    field holds EDNS flags.
+    """
+    qdcount, ancount, nscount, arcount = struct.unpack_from(">HHHH", packed, 4)
+    offset = 12
+    for _ in range(qdcount):
+        offset = _skip_name(packed, offset) + 4
+
+    fields = []
+    for _ in range(ancount + nscount + arcount):
+        offset = _skip_name(packed, offset)
+        rtype, _, ttl, rdlength = struct.unpack_from(">HHIH", packed, offset)
+        if rtype != QTYPE.OPT:
+            fields.append((offset + 4, ttl))
+        offset += 10 + rdlength
+    return tuple(fields)
+
+
+class _PendingQuery:
+    """A client query that has been forwarded upstream and awaits a reply."""
+
+    __slots__ = ("data", "addr", "key", "packet", "servers", "server_index", "deadline")
+
+    def __init__(
+        self,
+        data: bytes,
+        addr: tuple,
+        key: tuple[bytes, int, int],
+        packet: bytes,
+        servers: list[str],
+    ):
+        self.data = data
+        self.addr = addr
+        self.key = key
+        self.packet = packet
+        self.servers = servers
+        self.server_index = 0
+        self.deadline = 0.0
+
+
 class FocusBlockerDNS:
     """DNS server that blocks distracting websites based on time schedule."""
 
@@ -33,7 +180,29 @@ class FocusBlockerDNS:
         self.port = port
         self.socket: Optional[socket.socket] = None
         self.running = False
+        self._selector: Optional[selectors.BaseSelector] = None
+        # Self-pipe used by stop() to wake the selector without polling
+        self._wakeup_r: Optional[socket.socket] = None
+        self._wakeup_w: Optional[socket.socket] = None
+        # One connected UDP socket per upstream server, reused across queries
+        self._upstream_socks: dict[str, socket.socket] = {}
+        # Upstream sockets created off the loop thread, waiting to be registered
+        self._unregistered_socks: list[socket.socket] = []
+        # In-flight upstream queries keyed by the transaction ID we sent
+        self._pending: dict[int, _PendingQuery] = {}
+        # Guards _pending and _upstream_socks, shared with the worker pool
+        self._lock = threading.RLock()
+        self._pool: Optional[ThreadPoolExecutor] = None
+        self._sender: Optional[ResponseSender] = None
         self._network_monitor: Optional["NetworkMonitor"] = None
+        # FIFO of upstream responses keyed by (qname, qtype, qclass) ->
+        # (cached at, expiry, packed bytes, TTL field offsets and values)
+        self._resp_cache: OrderedDict[
+            tuple[bytes, int, int],
+            tuple[float, float, bytes, tuple[tuple[int, int], ...]],
+        ] = OrderedDict()
+        # LRU of packed dnslib-built blocked responses keyed by (qname, qtype)
+        self._blocked_cache: OrderedDict[tuple[bytes, int], bytes] = OrderedDict()
 
     def is_domain_blocked(self, domain: str) -> bool:
         """
@@ -42,18 +211,62 @@ class FocusBlockerDNS:
         Matches the domain itself and any subdomains.
         e.g., "www.youtube.com" matches "youtube.com"
         """
-        # Remove trailing dot if present (DNS FQDN format)
-        domain = domain.rstrip(".").lower()
+        return is_blocked(domain)
+
+    def _get_cached_response(
+        self, key: tuple[bytes, int, int], data: bytes
+    ) -> Optional[bytes]:
+        """
+        Return a cached upstream response rewritten for this request.
 
-        for blocked in BLOCKED_DOMAINS:
-            # Exact match
-            if domain == blocked:
-                return True
-            # Subdomain match (e.g., www.youtube.com ends with .youtube.com)
-            if domain.endswith("." + blocked):
-                return True
+        The transaction ID is the request's and every TTL is reduced by the
+        time the response has spent in the cache.
+        """
+        with self._lock:
+            entry = self._resp_cache.get(key)
+            if entry is None:
+                return None
+
+            now = time.monotonic()
+            cached_at, expiry, packed, ttl_fields = entry
+            if now >= expiry:
+                del self._resp_cache[key]
+                return None
+
+        response = bytearray(packed)
+        # Answer with the transaction ID of this request
+        response[:2] = data[:2]
+        elapsed = int(now - cached_at)
+        if elapsed:
+            for offset, ttl in ttl_fields:
+                struct.pack_into(">I", response, offset, max(ttl - elapsed, 0))
+        return bytes(response)
+
+    def _cache_response(
+        self, key: tuple[bytes, int, int], response: DNSRecord
+    ) -> bytes:
+        """Pack an upstream response and cache it for its minimum TTL."""
+        packed = response.pack()
+
+        # Only cache definitive answers (NOERROR / NXDOMAIN) with a usable
+        # TTL; truncated replies would make every client retry over TCP
+        ttl = _min_ttl(response)
+        if response.header.rcode not in (0, 3) or response.header.tc or ttl <= 0:
+            return packed
 
-        return False
+        try:
+            ttl_fields = _ttl_fields(packed)
+        except (IndexError, struct.error):
+            return packed
+
+        now = time.monotonic()
+        with self._lock:
+            self._resp_cache[key] = (now, now + ttl, packed, ttl_fields)
+            self._resp_cache.move_to_end(key)
+            # Evict oldest entries once the cache is full
+            while len(self._resp_cache) > RESPONSE_CACHE_SIZE:
+                self._resp_cache.popitem(last=False)
+        return packed
 
     def _get_upstream_dns_servers(self) -> list[str]:
         """Get list of upstream DNS servers to try, preferring network's original DNS."""
@@ -69,23 +282,138 @@ class FocusBlockerDNS:
             servers.append(UPSTREAM_DNS)
         return servers
 
-    def resolve_upstream(self, request: DNSRecord) -> Optional[DNSRecord]:
-        """Forward DNS request to upstream server."""
-        upstream_servers = self._get_upstream_dns_servers()
-
-        for upstream in upstream_servers:
+    def _get_upstream_socket(self, server: str) -> socket.socket:
+        """Get (or lazily create) the persistent socket for an upstream server."""
+        sock = self._upstream_socks.get(server)
+        if sock is None:
             sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+            sock.setblocking(False)
+            sock.connect((server, UPSTREAM_DNS_PORT))
+            self._upstream_socks[server] = sock
+            # Only the loop thread touches the selector; it registers this
+            # socket before its next select()
+            self._unregistered_socks.append(sock)
+        return sock
+
+    def _register_upstream_sockets(self) -> None:
+        """Register newly created upstream sockets (loop thread only)."""
+        with self._lock:
+            socks, self._unregistered_socks = self._unregistered_socks, []
+        for sock in socks:
+            self._selector.register(sock, selectors.EVENT_READ, self._drain_upstream)
+
+    def _wake_loop(self) -> None:
+        """Interrupt the loop's select() so it re-reads its state."""
+        wakeup = self._wakeup_w
+        if wakeup:
+            try:
+                wakeup.send(b"\0")
+            except OSError:
+                pass  # Already woken (buffer full) or closed
+
+    def _drain_wakeup(self, sock: socket.socket) -> None:
+        """Discard queued wakeup bytes."""
+        while True:
             try:
-                sock.settimeout(3)  # Shorter timeout since we have fallbacks
-                sock.sendto(request.pack(), (upstream, UPSTREAM_DNS_PORT))
-                response_data, _ = sock.recvfrom(4096)
-                return DNSRecord.parse(response_data)
+                if not sock.recv(4096):
+                    return
+            except OSError:
+                return
+
+    def _new_txid(self) -> int:
+        """Pick a random transaction ID not used by any in-flight query."""
+        while True:
+            txid = secrets.randbits(16)
+            if txid not in self._pending:
+                return txid
+
+    def forward_upstream(
+        self, data: bytes, addr: tuple, key: tuple[bytes, int, int]
+    ) -> None:
+        """
+        Forward a DNS request to the upstream servers without waiting.
+
+        The reply is relayed to the client by _drain_upstream; if a server
+        doesn't answer within UPSTREAM_TIMEOUT the next one is tried.
+        """
+        servers = self._get_upstream_dns_servers()
+        with self._lock:
+            # Pick the ID and claim it in one step so workers can't collide
+            txid = self._new_txid()
+            packet = bytearray(data)
+            struct.pack_into(">H", packet, 0, txid)
+            pending = _PendingQuery(data, addr, key, bytes(packet), servers)
+            self._pending[txid] = pending
+            self._send_pending(txid, pending)
+        # The loop may be blocked in select() with no timeout and no socket
+        # registered for the reply yet
+        self._wake_loop()
+
+    def _send_pending(self, txid: int, pending: _PendingQuery) -> None:
+        """Send a pending query to its next upstream server, or fail it.
+
+        Must be called with self._lock held.
+        """
+        while pending.server_index < len(pending.servers):
+            server = pending.servers[pending.server_index]
+            try:
+                self._get_upstream_socket(server).send(pending.packet)
+            except OSError:
+                pending.server_index += 1
+                continue
+            pending.deadline = time.monotonic() + UPSTREAM_TIMEOUT
+            return
+
+        # Every upstream failed, return SERVFAIL
+        del self._pending[txid]
+        self._send_to_client(_servfail(pending.data), pending.addr)
+
+    def _expire_pending(self) -> None:
+        """Fall back to the next upstream server for timed-out queries."""
+        now = time.monotonic()
+        with self._lock:
+            for txid, pending in list(self._pending.items()):
+                if now >= pending.deadline:
+                    pending.server_index += 1
+                    self._send_pending(txid, pending)
+
+    def _drain_upstream(self, sock: socket.socket) -> None:
+        """Relay every queued upstream reply back to the waiting client."""
+        while self.running:
+            try:
+                response_data = sock.recv(4096)
+            except BlockingIOError:
+                return
             except Exception:
                 continue
-            finally:
-                sock.close()
 
-        return None
+            try:
+                txid = struct.unpack_from(">H", response_data)[0]
+                # Only the loop thread retires queries that reached an
+                # upstream, so the entry stays put while the reply is parsed
+                with self._lock:
+                    pending = self._pending[txid]
+            except (KeyError, struct.error):
+                continue  # Late or unknown reply
+
+            try:
+                response = DNSRecord.parse(response_data)
+                packed = self._cache_response(pending.key, response)
+            except Exception:
+                # Malformed reply, fall back to the next upstream server
+                with self._lock:
+                    pending.server_index += 1
+                    self._send_pending(txid, pending)
+                continue
+
+            with self._lock:
+                self._pending.pop(txid, None)
+            # Restore the client's original transaction ID
+            self._send_to_client(pending.data[:2] + packed[2:], pending.addr)
+
+    def _send_to_client(self, response: bytes, addr: tuple) -> None:
+        """Queue a response for the batched sender thread."""
+        self._sender.send(response, addr)
 
     def create_blocked_response(self, request: DNSRecord) -> DNSRecord:
         """
@@ -112,47 +440,96 @@ class FocusBlockerDNS:
 
         return reply
 
+    def _blocked_packet(self, data: bytes, qtype: int, qend: int) -> Optional[bytes]:
+        """
+        Build a blocked A/AAAA response directly from the request bytes.
+
+        Copies the header and question from the query and appends a canned
+        answer record. Returns None when the generic dnslib path is needed.
+        """
+        answer = _BLOCKED_ANSWERS.get(qtype)
+        if answer is None:
+            return None
+
+        packet = bytearray(data[:qend])
+        # QR=1, AA=1, keep opcode and RD from the query; RA=1, RCODE=0
+        packet[2] = 0x84 | (data[2] & 0x79)
+        packet[3] = 0x80
+        # ANCOUNT=1, NSCOUNT=0, ARCOUNT=0
+        packet[6:12] = b"\x00\x01\x00\x00\x00\x00"
+        return bytes(packet) + answer
+
+    def _cached_blocked_response(self, data: bytes, key: tuple[bytes, int]) -> bytes:
+        """
+        Get a dnslib-built blocked response, reusing packed bytes across bursts.
+
+        Used for the types without a wire template (ANY, NXDOMAIN types);
+        only the transaction ID is rewritten on a cache hit.
+        """
+        with self._lock:
+            packed = self._blocked_cache.get(key)
+            if packed is not None:
+                self._blocked_cache.move_to_end(key)
+                return data[:2] + packed[2:]
+
+        packed = self.create_blocked_response(DNSRecord.parse(data)).pack()
+        with self._lock:
+            self._blocked_cache[key] = packed
+            if len(self._blocked_cache) > BLOCKED_CACHE_SIZE:
+                self._blocked_cache.popitem(last=False)
+        return packed
+
     def handle_request(self, data: bytes, addr: tuple) -> bytes:
         """Handle incoming DNS request."""
         try:
-            request = DNSRecord.parse(data)
-            qname = str(request.q.qname)
+            try:
+                qname, qtype, qend = _peek_question(data)
+                qclass = (data[qend - 2] << 8) | data[qend - 1]
+            except (IndexError, ValueError):
+                # Non-standard question, let dnslib decode it
+                request = DNSRecord.parse(data)
+                qname = b".".join(request.q.qname.label).translate(_LOWER_TABLE)
+                qtype, qclass, qend = request.q.qtype, request.q.qclass, 0
 
-            # Check if domain should be blocked
-            if is_blocking_active() and self.is_domain_blocked(qname):
+            # Check if domain should be blocked; the blocklist is only
+            # consulted inside the blocking window
+            blocking = _blocking_active_at(int(time.monotonic()))
+            if blocking and is_blocked_bytes(qname):
                 # Block the domain
-                response = self.create_blocked_response(request)
-            else:
-                # Forward to upstream DNS
-                response = self.resolve_upstream(request)
-                if response is None:
-                    # If upstream fails, return SERVFAIL
-                    response = request.reply()
-                    response.header.rcode = 2  # SERVFAIL
-
-            return response.pack()
+                if qend:
+                    packet = self._blocked_packet(data, qtype, qend)
+                    if packet is not None:
+                        return packet
+                return self._cached_blocked_response(data, (qname, qtype))
+
+            # Serve repeated queries from cache
+            key = (qname, qtype, qclass)
+            cached = self._get_cached_response(key, data)
+            if cached is not None:
+                return cached
+
+            # Forward the raw packet upstream; the reply is sent by _drain_upstream
+            self.forward_upstream(data, addr, key)
+            return b""
 
         except Exception:
             # Return SERVFAIL on error
-            try:
-                request = DNSRecord.parse(data)
-                response = request.reply()
-                response.header.rcode = 2
-                return response.pack()
-            except Exception:
-                return b""
+            return _servfail(data)
 
-    def start(self):
-        """Start the DNS server."""
-        self.socket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
-        self.socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    def _open_socket(self) -> socket.socket:
+        """Create and bind the listening UDP socket."""
+        sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        self._tune_socket(sock)
 
         try:
-            self.socket.bind((self.host, self.port))
+            sock.bind((self.host, self.port))
         except PermissionError:
+            sock.close()
             hint = "Run as Administrator." if IS_WINDOWS else "Run with sudo."
             raise PermissionError(f"Cannot bind to port {self.port}. {hint}")
         except OSError as e:
+            sock.close()
             if "Address already in use" in str(e):
                 raise OSError(
                     f"Port {self.port} is already in use. "
@@ -160,9 +537,10 @@ class FocusBlockerDNS:
                 )
             raise
 
-        self.running = True
+        return sock
 
-        # Start network monitor on macOS to auto-configure DNS on network changes
+    def _start_network_monitor(self) -> None:
+        """Start network monitor on macOS to auto-configure DNS on network changes."""
         if IS_MACOS:
             self._network_monitor = NetworkMonitor(
                 dns_server="127.0.0.1",
@@ -170,20 +548,82 @@ class FocusBlockerDNS:
             )
             self._network_monitor.start()
 
-        while self.running:
-            try:
-                self.socket.settimeout(1.0)
+    def start(self):
+        """Start the DNS server."""
+        self.socket = self._open_socket()
+        self.running = True
+        self._start_network_monitor()
+
+        self._pool = ThreadPoolExecutor(max_workers=WORKER_THREADS)
+        self._sender = ResponseSender(self.socket)
+        self._sender.start()
+        self._selector = selectors.DefaultSelector()
+        self._wakeup_r, self._wakeup_w = socket.socketpair()
+        self._wakeup_r.setblocking(False)
+        self._wakeup_w.setblocking(False)
+        self.socket.setblocking(False)
+        self._selector.register(self.socket, selectors.EVENT_READ, self._drain_socket)
+        self._selector.register(self._wakeup_r, selectors.EVENT_READ, self._drain_wakeup)
+
+        try:
+            while self.running:
+                self._register_upstream_sockets()
+                # Only wake up periodically while upstream queries are in flight
+                timeout = 0.5 if self._pending else None
+                try:
+                    events = self._selector.select(timeout)
+                except (OSError, ValueError):
+                    break
+
+                for key, _ in events:
+                    key.data(key.fileobj)
+
+                if self._pending:
+                    self._expire_pending()
+        finally:
+            self._close_sockets()
+
+    @staticmethod
+    def _tune_socket(sock: socket.socket) -> None:
+        """Enlarge kernel buffers so bursts of queries aren't dropped."""
+        for option in (socket.SO_RCVBUF, socket.SO_SNDBUF):
+            # The OS may cap buffer sizes (e.g. kern.ipc.maxsockbuf on macOS),
+            # so back off until a size is accepted
+            size = SOCKET_BUFFER_SIZE
+            while size >= 1 << 16:
                 try:
-                    data, addr = self.socket.recvfrom(4096)
-                except socket.timeout:
-                    continue
+                    sock.setsockopt(socket.SOL_SOCKET, option, size)
+                    break
+                except OSError:
+                    size >>= 1
 
-                response = self.handle_request(data, addr)
-                if response:
-                    self.socket.sendto(response, addr)
+        # Skip path MTU discovery on Linux; replies only go over loopback
+        if IS_LINUX:
+            try:
+                sock.setsockopt(socket.IPPROTO_IP, IP_MTU_DISCOVER, IP_PMTUDISC_DONT)
+            except OSError:
+                pass
 
+    def _drain_socket(self, sock: socket.socket) -> None:
+        """Hand every queued client packet to the worker pool."""
+        while self.running:
+            try:
+                data, addr = sock.recvfrom(4096)
+            except BlockingIOError:
+                return
             except Exception:
-                pass
+                continue
+
+            try:
+                self._pool.submit(self._process_and_send, data, addr)
+            except RuntimeError:
+                return  # Pool was shut down by stop()
+
+    def _process_and_send(self, data: bytes, addr: tuple) -> None:
+        """Handle a request on a worker thread and send any immediate response."""
+        response = self.handle_request(data, addr)
+        if response:
+            self._send_to_client(response, addr)
 
     def stop(self):
         """Stop the DNS server."""
@@ -194,6 +634,35 @@ class FocusBlockerDNS:
             self._network_monitor.stop()
             self._network_monitor = None
 
-        if self.socket:
-            self.socket.close()
-            self.socket = None
+        if self._pool:
+            self._pool.shutdown(wait=False)
+
+        if self._sender:
+            self._sender.stop()
+
+        # Don't carry a stale blocking state over to the next start()
+        _blocking_active_at.cache_clear()
+
+        # Wake the selector so the serve loop notices running is False and
+        # closes its sockets on the way out
+        self._wake_loop()
+
+    def _close_sockets(self) -> None:
+        """Close the selector and every socket owned by the serve loop."""
+        if self._selector:
+            self._selector.close()
+            self._selector = None
+
+        for sock in (
+            self._wakeup_r,
+            self._wakeup_w,
+            self.socket,
+            *self._upstream_socks.values(),
+        ):
+            if sock:
+                sock.close()
+        self._wakeup_r = self._wakeup_w = None
+        self.socket = None
+        self._upstream_socks.clear()
+        self._unregistered_socks.clear()
+        self._pending.clear()
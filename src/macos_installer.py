@@ -1,16 +1,28 @@
 """macOS LaunchDaemon installer for Focus Blocker."""
 
+import functools
 import os
+import shutil
 import sys
 import subprocess
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
+from typing import Iterator, Optional
+
+from network_monitor import flush_dns_cache as _flush_dns_cache
+from status_cache import invalidates_status, status_bucket
 
 PLIST_NAME = "com.focus.blocker.plist"
 PLIST_PATH = Path(f"/Library/LaunchDaemons/{PLIST_NAME}")
+_PLIST_PATH_STR = str(PLIST_PATH)
 RESOLVER_DIR = Path("/etc/resolver")
 
-# TLDs for resolver files (covers most websites)
-TLDS = [
+# Absolute tool paths, looked up once at import
+NETWORKSETUP = shutil.which("networksetup") or "/usr/sbin/networksetup"
+LAUNCHCTL = shutil.which("launchctl") or "/bin/launchctl"
+
+# TLDs for resolver files (covers most websites), deduplicated in order
+TLDS = tuple(dict.fromkeys([
     "com",
     "net",
     "org",
@@ -87,72 +99,89 @@ TLDS = [
     "music",
     "game",
     "games",
-]
+]))
+
+# String paths of every resolver file, built once
+_RESOLVER_PATHS = tuple(str(RESOLVER_DIR / tld) for tld in TLDS)
 
 
-def get_network_services() -> list[str]:
-    """Get all network services (excluding disabled ones)."""
+def get_network_services() -> Iterator[str]:
+    """Yield all network services (excluding disabled ones)."""
     result = subprocess.run(
-        ["networksetup", "-listallnetworkservices"],
+        [NETWORKSETUP, "-listallnetworkservices"],
         capture_output=True,
         text=True,
+        close_fds=False,
     )
-    services = []
-    for line in result.stdout.strip().split("\n"):
+    for line in result.stdout.splitlines():
         # Skip header line and disabled services (marked with *)
         if line and not line.startswith("An asterisk") and not line.startswith("*"):
-            services.append(line)
-    return services
+            yield line
 
 
 def set_dns_all_services(dns_server: str) -> None:
     """Set DNS server for all network services."""
-    services = get_network_services()
-    for service in services:
+
+    def set_dns(service: str) -> str:
         subprocess.run(
-            ["networksetup", "-setdnsservers", service, dns_server],
-            capture_output=True,
+            [NETWORKSETUP, "-setdnsservers", service, dns_server],
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+            close_fds=False,
         )
-        print(f"  Configured DNS for: {service}")
+        return f"  Configured DNS for: {service}"
+
+    # Each networksetup call is a separate process, so run them concurrently
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        lines = list(executor.map(set_dns, get_network_services()))
+    if lines:
+        print("\n".join(lines))
 
 
 def setup_resolver_files(dns_server: str) -> None:
     """Set up /etc/resolver/ files to redirect DNS queries."""
-    RESOLVER_DIR.mkdir(mode=0o755, exist_ok=True)
-
-    for tld in TLDS:
-        resolver_file = RESOLVER_DIR / tld
-        resolver_file.write_text(f"nameserver {dns_server}\n")
-        os.chmod(resolver_file, 0o644)
-        print(f"  Created resolver for: .{tld}")
+    os.makedirs(RESOLVER_DIR, mode=0o755, exist_ok=True)
+    # Every file shares one buffer, so nothing is re-encoded per TLD
+    buffers = (memoryview(f"nameserver {dns_server}\n".encode()),)
+
+    def write_resolver(tld: str, path: str) -> str:
+        flags = os.O_WRONLY | os.O_CREAT | os.O_TRUNC | os.O_CLOEXEC
+        fd = os.open(path, flags, 0o644)
+        try:
+            os.writev(fd, buffers)
+            # mDNSResponder must read these; the open() mode is masked by the
+            # umask and doesn't apply to files that already exist
+            os.fchmod(fd, 0o644)
+        finally:
+            os.close(fd)
+        return f"  Created resolver for: .{tld}"
+
+    # Resolver writes are independent and I/O-bound, so overlap them
+    with ThreadPoolExecutor(max_workers=16) as executor:
+        lines = list(executor.map(write_resolver, TLDS, _RESOLVER_PATHS))
+    print("\n".join(lines))
 
 
 def cleanup_resolver_files() -> None:
     """Remove /etc/resolver/ files we created."""
-    for tld in TLDS:
-        resolver_file = RESOLVER_DIR / tld
-        if resolver_file.exists():
-            resolver_file.unlink()
-            print(f"  Removed resolver for: .{tld}")
-
 
-def flush_dns_cache() -> None:
-    """Flush DNS cache."""
-    subprocess.run(["dscacheutil", "-flushcache"], capture_output=True)
-    subprocess.run(["killall", "-HUP", "mDNSResponder"], capture_output=True)
-    print("  Flushed DNS cache")
+    def remove_resolver(tld: str, path: str) -> Optional[str]:
+        try:
+            os.unlink(path)
+        except FileNotFoundError:
+            return None
+        return f"  Removed resolver for: .{tld}"
 
+    with ThreadPoolExecutor(max_workers=16) as executor:
+        lines = [line for line in executor.map(remove_resolver, TLDS, _RESOLVER_PATHS) if line]
+    if lines:
+        print("\n".join(lines))
 
-def configure_system_dns() -> None:
-    """Configure system-wide DNS using resolver files and network services."""
-    # Method 1: Set up resolver files (persists across network changes)
-    print("  Setting up resolver files...")
-    setup_resolver_files("127.0.0.1")
 
-    # Method 2: Also set network service DNS (for immediate effect)
-    set_dns_all_services("127.0.0.1")
-
-    flush_dns_cache()
+def flush_dns_cache() -> None:
+    """Flush DNS cache (shared, debounced implementation in network_monitor)."""
+    if _flush_dns_cache():
+        print("  Flushed DNS cache")
 
 
 def reset_system_dns() -> None:
@@ -167,22 +196,11 @@ def reset_system_dns() -> None:
     flush_dns_cache()
 
 
-def get_python_path() -> str:
-    """Get the full path to the current Python interpreter."""
-    return sys.executable
+# Interpreter and project paths are fixed for the life of the process
+_PYTHON_PATH = sys.executable
+_PROJECT_PATH = Path(__file__).parent.resolve()
 
-
-def get_project_path() -> Path:
-    """Get the project root directory (where main.py lives)."""
-    return Path(__file__).parent.resolve()
-
-
-def create_plist_content() -> str:
-    """Generate the LaunchDaemon plist content."""
-    python_path = get_python_path()
-    project_path = get_project_path()
-
-    return f"""<?xml version="1.0" encoding="UTF-8"?>
+_PLIST_TEMPLATE = """<?xml version="1.0" encoding="UTF-8"?>
 <!DOCTYPE plist PUBLIC "-//Apple//DTD PLIST 1.0//EN" "http://www.apple.com/DTDs/PropertyList-1.0.dtd">
 <plist version="1.0">
 <dict>
@@ -215,22 +233,80 @@ def create_plist_content() -> str:
 """
 
 
+def get_python_path() -> str:
+    """Get the full path to the current Python interpreter."""
+    return _PYTHON_PATH
+
+
+def get_project_path() -> Path:
+    """Get the project root directory (where main.py lives)."""
+    return _PROJECT_PATH
+
+
+def create_plist_content() -> str:
+    """Generate the LaunchDaemon plist content."""
+    return _PLIST_TEMPLATE.format(
+        python_path=_PYTHON_PATH, project_path=_PROJECT_PATH
+    )
+
+
+def _read_plist() -> Optional[str]:
+    """Read the installed plist, or None if it doesn't exist."""
+    try:
+        return PLIST_PATH.read_text()
+    except OSError:
+        return None
+
+
+def _bootout_service() -> None:
+    """Unload the LaunchDaemon (modern launchctl method), ignoring errors."""
+    subprocess.run(
+        [LAUNCHCTL, "bootout", f"system/{PLIST_NAME.replace('.plist', '')}"],
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+        close_fds=False,
+    )
+
+
+@functools.lru_cache(maxsize=1)
+def _is_installed_cached(bucket: int) -> bool:
+    return os.path.exists(_PLIST_PATH_STR)
+
+
+@functools.lru_cache(maxsize=1)
+def _is_running_cached(bucket: int) -> bool:
+    result = subprocess.run(
+        [LAUNCHCTL, "print", "system/com.focus.blocker"],
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+        close_fds=False,
+    )
+    return result.returncode == 0
+
+
+_invalidates_status = invalidates_status(_is_installed_cached, _is_running_cached)
+
+
+@_invalidates_status
 def install() -> bool:
     """Install the LaunchDaemon."""
     if os.geteuid() != 0:
         print("Error: Installation requires root privileges. Run with sudo.")
         return False
 
+    plist_content = create_plist_content()
+
+    # Re-installing an unchanged, running service would only restart it
+    if _read_plist() == plist_content and is_running():
+        print("Focus Blocker is already installed and up to date.")
+        return True
+
     # Stop existing service if running
-    if PLIST_PATH.exists():
+    if os.path.exists(_PLIST_PATH_STR):
         print("Stopping existing service...")
-        subprocess.run(
-            ["launchctl", "bootout", f"system/{PLIST_NAME.replace('.plist', '')}"],
-            capture_output=True,
-        )
+        _bootout_service()
 
     # Write plist file
-    plist_content = create_plist_content()
     try:
         PLIST_PATH.write_text(plist_content)
         os.chmod(PLIST_PATH, 0o644)
@@ -240,25 +316,27 @@ def install() -> bool:
         return False
 
     # Bootstrap the service (modern launchctl method that survives reboots)
-    # First, try to bootout in case it's already loaded
-    subprocess.run(
-        ["launchctl", "bootout", f"system/{PLIST_NAME.replace('.plist', '')}"],
-        capture_output=True,
-    )
-
     result = subprocess.run(
-        ["launchctl", "bootstrap", "system", str(PLIST_PATH)],
+        [LAUNCHCTL, "bootstrap", "system", _PLIST_PATH_STR],
         capture_output=True,
         text=True,
+        close_fds=False,
     )
-
     if result.returncode != 0:
         print(f"Error bootstrapping service: {result.stderr}")
         return False
 
-    # Configure system DNS to use our local DNS server for all network services
+    # Only touch DNS once the server is running. Resolver files
+    # (/etc/resolver) and networksetup are independent, so run both at once.
     print("Configuring system DNS to use Focus Blocker...")
-    configure_system_dns()
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        # Resolver files persist across network changes
+        resolvers = executor.submit(setup_resolver_files, "127.0.0.1")
+        dns = executor.submit(set_dns_all_services, "127.0.0.1")
+    resolvers.result()
+    dns.result()
+
+    flush_dns_cache()
 
     print("\nFocus Blocker installed successfully!")
     print("The DNS server will start automatically on boot.")
@@ -267,22 +345,19 @@ def install() -> bool:
     return True
 
 
+@_invalidates_status
 def uninstall() -> bool:
     """Uninstall the LaunchDaemon."""
     if os.geteuid() != 0:
         print("Error: Uninstallation requires root privileges. Run with sudo.")
         return False
 
-    if not PLIST_PATH.exists():
+    if not os.path.exists(_PLIST_PATH_STR):
         print("Focus Blocker is not installed.")
         return True
 
     # Bootout the service (modern launchctl method)
-    subprocess.run(
-        ["launchctl", "bootout", f"system/{PLIST_NAME.replace('.plist', '')}"],
-        capture_output=True,
-        text=True,
-    )
+    _bootout_service()
 
     # Remove plist file
     try:
@@ -301,17 +376,12 @@ def uninstall() -> bool:
 
 def is_installed() -> bool:
     """Check if Focus Blocker is installed as a LaunchDaemon."""
-    return PLIST_PATH.exists()
+    return _is_installed_cached(status_bucket())
 
 
 def is_running() -> bool:
     """Check if the Focus Blocker service is running."""
-    result = subprocess.run(
-        ["launchctl", "print", "system/com.focus.blocker"],
-        capture_output=True,
-        text=True,
-    )
-    return result.returncode == 0
+    return _is_running_cached(status_bucket())
 
 
 def get_status() -> dict:
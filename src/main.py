@@ -3,6 +3,7 @@
 import sys
 import signal
 
+from async_dns_server import AsyncFocusBlockerDNS, HAS_UVLOOP
 from dns_server import FocusBlockerDNS, IS_WINDOWS
 from scheduler import get_status_message
 from installer import install, uninstall, get_status
@@ -36,7 +37,8 @@ DNS settings are automatically maintained when switching networks.
 
 def cmd_start():
     """Start the DNS server in foreground."""
-    server = FocusBlockerDNS()
+    # Prefer the uvloop-driven asyncio server, fall back to the threaded one
+    server = AsyncFocusBlockerDNS() if HAS_UVLOOP else FocusBlockerDNS()
 
     def signal_handler(signum, frame):
         server.stop()
@@ -1,41 +1,110 @@
 """Network change monitor for automatic DNS configuration on macOS."""
 
 import re
+import shutil
 import subprocess
 import threading
 import time
 from typing import Callable, Optional
 
+# Full paths so subprocess calls skip the PATH search
+SCUTIL = shutil.which("scutil") or "/usr/sbin/scutil"
+ROUTE = shutil.which("route") or "/sbin/route"
+IPCONFIG = shutil.which("ipconfig") or "/usr/sbin/ipconfig"
+DSCACHEUTIL = "/usr/bin/dscacheutil"
+KILLALL = "/usr/bin/killall"
+
+# Prefer in-process SystemConfiguration calls (PyObjC) over spawning scutil
+try:
+    from CoreFoundation import (
+        CFRunLoopAddSource,
+        CFRunLoopGetCurrent,
+        CFRunLoopRunInMode,
+        CFRunLoopStop,
+        kCFRunLoopDefaultMode,
+    )
+    from SystemConfiguration import (
+        SCDynamicStoreCopyValue,
+        SCDynamicStoreCreate,
+        SCDynamicStoreCreateRunLoopSource,
+        SCDynamicStoreSetNotificationKeys,
+        SCDynamicStoreSetValue,
+    )
+except ImportError:
+    SCDynamicStoreCreate = None
+
+_STORE = (
+    SCDynamicStoreCreate(None, "focus_blocker", None, None)
+    if SCDynamicStoreCreate is not None
+    else None
+)
+HAS_SYSTEM_CONFIGURATION = _STORE is not None
+
+# Byte patterns for parsing scutil / ipconfig output without decoding it
+_IPV4_RE = re.compile(rb"(\d+\.\d+\.\d+\.\d+)")
+_DNS_LINE = b"domain_name_server"
+_PRIMARY_RESOLVER = b"resolver #1"
+_RESOLVER = b"resolver #"
+_NAMESERVER = b"nameserver["
+
+# Dynamic store keys whose changes mean the network (or its DNS) changed
+_WATCHED_KEYS = ("State:/Network/Global/IPv4", "State:/Network/Global/DNS")
+
+
+def _copy_store_value(key: str) -> dict:
+    """Read a dynamic store dictionary (empty if missing)."""
+    value = SCDynamicStoreCopyValue(_STORE, key)
+    return dict(value) if value else {}
+
+
+def _set_store_dns(key: str, dns_server: str) -> bool:
+    """Write a DNS dictionary with a single server to the dynamic store."""
+    return bool(
+        SCDynamicStoreSetValue(_STORE, key, {"ServerAddresses": [dns_server]})
+    )
+
 
 def get_current_dns_from_scutil() -> list[str]:
-    """Get current DNS servers using scutil."""
+    """Get current DNS servers using SystemConfiguration or scutil."""
+    if HAS_SYSTEM_CONFIGURATION:
+        value = _copy_store_value("State:/Network/Global/DNS")
+        return [str(ip) for ip in value.get("ServerAddresses", [])]
+
     result = subprocess.run(
-        ["scutil", "--dns"],
+        [SCUTIL, "--dns"],
         capture_output=True,
-        text=True,
+        close_fds=False,
     )
 
     dns_servers = []
     in_resolver = False
 
-    for line in result.stdout.split("\n"):
+    for line in result.stdout.split(b"\n"):
         line = line.strip()
-        if line.startswith("resolver #1"):
+        if line.startswith(_PRIMARY_RESOLVER):
             in_resolver = True
-        elif line.startswith("resolver #") and in_resolver:
+        elif line.startswith(_RESOLVER) and in_resolver:
             break  # Only care about primary resolver
-        elif in_resolver and line.startswith("nameserver["):
+        elif in_resolver and line.startswith(_NAMESERVER):
             # Extract IP from "nameserver[0] : 127.0.0.1"
-            if ":" in line:
-                ip = line.split(":")[-1].strip()
+            if b":" in line:
+                ip = line.split(b":")[-1].strip()
                 if ip:
-                    dns_servers.append(ip)
+                    dns_servers.append(ip.decode())
 
     return dns_servers
 
 
 def set_dns_via_scutil(dns_server: str) -> bool:
-    """Set DNS server using scutil (works when running as root)."""
+    """Set DNS server using SystemConfiguration or scutil (works when running as root)."""
+    if HAS_SYSTEM_CONFIGURATION:
+        keys = (
+            "State:/Network/Service/focus_blocker/DNS",
+            "Setup:/Network/Service/focus_blocker/DNS",
+            "State:/Network/Global/DNS",
+        )
+        return all([_set_store_dns(key, dns_server) for key in keys])
+
     # Create scutil commands to set DNS
     scutil_commands = f"""
 d.init
@@ -49,10 +118,12 @@ quit
 """
 
     result = subprocess.run(
-        ["scutil"],
+        [SCUTIL],
         input=scutil_commands,
-        capture_output=True,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
         text=True,
+        close_fds=False,
     )
 
     return result.returncode == 0
@@ -60,11 +131,18 @@ quit
 
 def get_primary_service_id() -> Optional[str]:
     """Get the primary network service ID."""
+    if HAS_SYSTEM_CONFIGURATION:
+        service_id = _copy_store_value("State:/Network/Global/IPv4").get(
+            "PrimaryService"
+        )
+        return str(service_id) if service_id else None
+
     result = subprocess.run(
-        ["scutil"],
+        [SCUTIL],
         input="show State:/Network/Global/IPv4\nquit\n",
         capture_output=True,
         text=True,
+        close_fds=False,
     )
 
     service_id = None
@@ -79,7 +157,10 @@ def get_primary_service_id() -> Optional[str]:
 
 
 def set_dns_for_service(service_id: str, dns_server: str) -> bool:
-    """Set DNS for a specific service ID using scutil."""
+    """Set DNS for a specific service ID using SystemConfiguration or scutil."""
+    if HAS_SYSTEM_CONFIGURATION:
+        return _set_store_dns(f"State:/Network/Service/{service_id}/DNS", dns_server)
+
     scutil_commands = f"""
 d.init
 d.add ServerAddresses * {dns_server}
@@ -88,27 +169,62 @@ quit
 """
 
     result = subprocess.run(
-        ["scutil"],
+        [SCUTIL],
         input=scutil_commands,
-        capture_output=True,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
         text=True,
+        close_fds=False,
     )
 
     return result.returncode == 0
 
 
-def flush_dns_cache() -> None:
-    """Flush the system DNS cache."""
-    subprocess.run(["dscacheutil", "-flushcache"], capture_output=True)
-    subprocess.run(["killall", "-HUP", "mDNSResponder"], capture_output=True)
+# Back-to-back flushes within this many seconds are coalesced
+FLUSH_DEBOUNCE_SECONDS = 1.0
+
+_flush_lock = threading.Lock()
+_last_flush = 0.0
+
+
+def flush_dns_cache() -> bool:
+    """
+    Flush the system DNS cache.
+
+    Both flush commands run concurrently. Returns False if a flush already
+    ran within FLUSH_DEBOUNCE_SECONDS and this call was skipped.
+    """
+    global _last_flush
+    with _flush_lock:
+        now = time.monotonic()
+        if now - _last_flush < FLUSH_DEBOUNCE_SECONDS:
+            return False
+        _last_flush = now
+
+    processes = [
+        subprocess.Popen(
+            command,
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+            close_fds=False,
+        )
+        for command in (
+            [DSCACHEUTIL, "-flushcache"],
+            [KILLALL, "-HUP", "mDNSResponder"],
+        )
+    ]
+    for process in processes:
+        process.wait()
+    return True
 
 
 def get_active_interface() -> Optional[str]:
     """Get the currently active network interface."""
     result = subprocess.run(
-        ["route", "-n", "get", "default"],
+        [ROUTE, "-n", "get", "default"],
         capture_output=True,
         text=True,
+        close_fds=False,
     )
 
     for line in result.stdout.split("\n"):
@@ -125,18 +241,17 @@ def get_dhcp_dns_servers() -> list[str]:
         return []
 
     result = subprocess.run(
-        ["ipconfig", "getpacket", interface],
+        [IPCONFIG, "getpacket", interface],
         capture_output=True,
-        text=True,
+        close_fds=False,
     )
 
     dns_servers = []
-    for line in result.stdout.split("\n"):
+    for line in result.stdout.split(b"\n"):
         # Look for domain_name_server line like: domain_name_server (ip_mult): {172.30.240.1}
-        if "domain_name_server" in line:
+        if _DNS_LINE in line:
             # Extract IPs from between { }
-            ips = re.findall(r"(\d+\.\d+\.\d+\.\d+)", line)
-            dns_servers.extend(ips)
+            dns_servers.extend(ip.decode() for ip in _IPV4_RE.findall(line))
 
     return dns_servers
 
@@ -175,6 +290,15 @@ class NetworkMonitor:
         self._thread: Optional[threading.Thread] = None
         self._last_interface: Optional[str] = None
         self._last_service_id: Optional[str] = None
+        self._run_loop = None
+        # After a successful configure, trust it until this monotonic time
+        self._dns_verified_until = 0.0
+        # At most one reconfigure per debounce window; suppressed calls are
+        # coalesced into a single trailing reconfigure when it closes
+        self._debounce_s = 2.0
+        self._last_configure = 0.0
+        self._configure_lock = threading.Lock()
+        self._trailing_timer: Optional[threading.Timer] = None
 
         # Capture original DNS servers before we override them
         self._capture_original_dns()
@@ -197,8 +321,26 @@ class NetworkMonitor:
         if original:
             NetworkMonitor.original_upstream_dns = original
 
-    def _configure_dns(self) -> bool:
-        """Configure DNS to use our server."""
+    def _configure_dns(self, service_id: Optional[str] = None) -> bool:
+        """
+        Configure DNS to use our server (debounced).
+
+        Args:
+            service_id: Primary service ID if the caller already looked it up
+        """
+        with self._configure_lock:
+            now = time.monotonic()
+            remaining = self._last_configure + self._debounce_s - now
+            if remaining > 0:
+                if self._trailing_timer is None:
+                    self._trailing_timer = threading.Timer(
+                        remaining, self._trailing_configure
+                    )
+                    self._trailing_timer.daemon = True
+                    self._trailing_timer.start()
+                return True
+            self._last_configure = now
+
         success = False
 
         # Method 1: Set global DNS
@@ -207,7 +349,8 @@ class NetworkMonitor:
             success = True
 
         # Method 2: Set DNS for primary service
-        service_id = get_primary_service_id()
+        if service_id is None:
+            service_id = get_primary_service_id()
         service_success = False
         if service_id:
             service_success = set_dns_for_service(service_id, self.dns_server)
@@ -216,12 +359,23 @@ class NetworkMonitor:
                 self._last_service_id = service_id
 
         if success:
+            self._dns_verified_until = time.monotonic() + 60.0
             flush_dns_cache()
             if self.on_reconfigure:
                 self.on_reconfigure(service_id or "global")
 
         return success
 
+    def _trailing_configure(self) -> None:
+        """Run the reconfigure suppressed during the last debounce window."""
+        with self._configure_lock:
+            self._trailing_timer = None
+        if self._running:
+            try:
+                self._configure_dns()
+            except Exception:
+                pass
+
     def _check_and_configure_dns(self) -> None:
         """Check DNS settings and reconfigure if needed."""
         current_interface = get_active_interface()
@@ -236,11 +390,14 @@ class NetworkMonitor:
             and current_service_id != self._last_service_id
         )
 
-        # Check if DNS needs configuration
-        dns_correct = is_dns_configured(self.dns_server)
-
-        if not dns_correct or interface_changed or service_changed:
-            self._configure_dns()
+        if interface_changed or service_changed:
+            self._configure_dns(service_id=current_service_id)
+        elif time.monotonic() >= self._dns_verified_until:
+            # Only re-read the system DNS once the last configure goes stale
+            if is_dns_configured(self.dns_server):
+                self._dns_verified_until = time.monotonic() + 60.0
+            else:
+                self._configure_dns(service_id=current_service_id)
 
         # Update state
         self._last_interface = current_interface
@@ -261,18 +418,54 @@ class NetworkMonitor:
                     # Silently continue on errors to keep monitoring
                     pass
 
+    def _on_store_change(self, store, changed_keys, info) -> None:
+        """SCDynamicStore callback, run on the monitor's run loop."""
+        # A change notification invalidates the last verified configuration
+        self._dns_verified_until = 0.0
+        try:
+            self._check_and_configure_dns()
+        except Exception:
+            # Silently continue on errors to keep monitoring
+            pass
+
+    def _event_loop(self) -> None:
+        """Wait for dynamic store notifications instead of polling."""
+        # Initial configuration
+        self._configure_dns()
+
+        store = SCDynamicStoreCreate(
+            None, "focus_blocker_monitor", self._on_store_change, None
+        )
+        SCDynamicStoreSetNotificationKeys(store, list(_WATCHED_KEYS), None)
+        source = SCDynamicStoreCreateRunLoopSource(None, store, 0)
+        self._run_loop = CFRunLoopGetCurrent()
+        CFRunLoopAddSource(self._run_loop, source, kCFRunLoopDefaultMode)
+
+        # Run in bounded slices so a stop() that lands before the run loop is
+        # entered is still noticed; CFRunLoopStop ends a slice early
+        while self._running:
+            CFRunLoopRunInMode(kCFRunLoopDefaultMode, self.check_interval, False)
+        self._run_loop = None
+
     def start(self) -> None:
         """Start the network monitor in a background thread."""
         if self._running:
             return
 
         self._running = True
-        self._thread = threading.Thread(target=self._monitor_loop, daemon=True)
+        target = self._event_loop if HAS_SYSTEM_CONFIGURATION else self._monitor_loop
+        self._thread = threading.Thread(target=target, daemon=True)
         self._thread.start()
 
     def stop(self) -> None:
         """Stop the network monitor."""
         self._running = False
+        with self._configure_lock:
+            if self._trailing_timer is not None:
+                self._trailing_timer.cancel()
+                self._trailing_timer = None
+        if self._run_loop is not None:
+            CFRunLoopStop(self._run_loop)
         if self._thread:
             self._thread.join(timeout=self.check_interval + 1)
             self._thread = None
@@ -0,0 +1,152 @@
+"""Batched background sender for outbound DNS responses."""
+
+import ctypes
+import socket
+import struct
+import sys
+import threading
+from collections import deque
+from typing import Callable, Optional
+
+IS_LINUX = sys.platform.startswith("linux")
+
+
+class _IoVec(ctypes.Structure):
+    _fields_ = [("iov_base", ctypes.c_void_p), ("iov_len", ctypes.c_size_t)]
+
+
+class _MsgHdr(ctypes.Structure):
+    _fields_ = [
+        ("msg_name", ctypes.c_void_p),
+        ("msg_namelen", ctypes.c_uint32),
+        ("msg_iov", ctypes.POINTER(_IoVec)),
+        ("msg_iovlen", ctypes.c_size_t),
+        ("msg_control", ctypes.c_void_p),
+        ("msg_controllen", ctypes.c_size_t),
+        ("msg_flags", ctypes.c_int),
+    ]
+
+
+class _MMsgHdr(ctypes.Structure):
+    _fields_ = [("msg_hdr", _MsgHdr), ("msg_len", ctypes.c_uint)]
+
+
+def _load_sendmmsg() -> Optional[Callable[..., int]]:
+    """Get libc's sendmmsg(2) on Linux, or None where it isn't available."""
+    if not IS_LINUX:
+        return None
+    try:
+        libc = ctypes.CDLL(None, use_errno=True)
+        sendmmsg = libc.sendmmsg
+    except (OSError, AttributeError):
+        return None
+    sendmmsg.argtypes = [
+        ctypes.c_int,
+        ctypes.POINTER(_MMsgHdr),
+        ctypes.c_uint,
+        ctypes.c_int,
+    ]
+    sendmmsg.restype = ctypes.c_int
+    return sendmmsg
+
+
+def _sockaddr_in(addr: tuple) -> bytes:
+    """Pack an (ip, port) tuple into a Linux struct sockaddr_in."""
+    ip, port = addr[0], addr[1]
+    return (
+        struct.pack("=H", socket.AF_INET)
+        + struct.pack(">H", port)
+        + socket.inet_aton(ip)
+        + bytes(8)
+    )
+
+
+class ResponseSender:
+    """Sends queued responses from a background thread in batches."""
+
+    def __init__(self, sock: socket.socket, batch_size: int = 64):
+        """
+        Initialize the sender.
+
+        Args:
+            sock: The UDP socket responses are sent from
+            batch_size: Maximum number of responses per sendmmsg call (default: 64)
+        """
+        self.sock = sock
+        self.batch_size = batch_size
+
+        self._queue: deque[tuple[bytes, tuple]] = deque()
+        self._wakeup = threading.Event()
+        self._running = False
+        self._thread: Optional[threading.Thread] = None
+        self._sendmmsg = _load_sendmmsg()
+
+    def send(self, response: bytes, addr: tuple) -> None:
+        """Queue a response for sending; never blocks the caller."""
+        self._queue.append((response, addr))
+        self._wakeup.set()
+
+    def _send_loop(self) -> None:
+        """Main sender loop."""
+        while self._running:
+            self._wakeup.wait()
+            self._wakeup.clear()
+
+            while self._queue and self._running:
+                batch = []
+                while self._queue and len(batch) < self.batch_size:
+                    batch.append(self._queue.popleft())
+                self._flush(batch)
+
+    def _flush(self, batch: list[tuple[bytes, tuple]]) -> None:
+        """Send a batch with one sendmmsg call, or one sendto per response."""
+        sent = 0
+        if self._sendmmsg is not None and len(batch) > 1:
+            sent = max(self._send_batch(batch), 0)
+
+        for response, addr in batch[sent:]:
+            try:
+                self.sock.sendto(response, addr)
+            except Exception:
+                pass
+
+    def _send_batch(self, batch: list[tuple[bytes, tuple]]) -> int:
+        """Send a batch via sendmmsg(2); returns how many were sent (-1 on error)."""
+        count = len(batch)
+        msgs = (_MMsgHdr * count)()
+        iovs = (_IoVec * count)()
+        # Keep the buffers alive until sendmmsg returns
+        keepalive = []
+
+        for i, (response, addr) in enumerate(batch):
+            name = ctypes.create_string_buffer(_sockaddr_in(addr), 16)
+            data = ctypes.c_char_p(response)
+            keepalive.append((name, data))
+
+            iovs[i].iov_base = ctypes.cast(data, ctypes.c_void_p)
+            iovs[i].iov_len = len(response)
+            msgs[i].msg_hdr.msg_name = ctypes.cast(name, ctypes.c_void_p)
+            msgs[i].msg_hdr.msg_namelen = 16
+            msgs[i].msg_hdr.msg_iov = ctypes.pointer(iovs[i])
+            msgs[i].msg_hdr.msg_iovlen = 1
+
+        try:
+            return self._sendmmsg(self.sock.fileno(), msgs, count, 0)
+        except Exception:
+            return -1
+
+    def start(self) -> None:
+        """Start the sender in a background thread."""
+        if self._running:
+            return
+
+        self._running = True
+        self._thread = threading.Thread(target=self._send_loop, daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        """Stop the sender, dropping any responses still queued."""
+        self._running = False
+        self._wakeup.set()
+        self._thread = None
+        self._queue.clear()
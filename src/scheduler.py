@@ -1,6 +1,7 @@
 """Time-based scheduler for blocking logic."""
 
-from datetime import datetime
+import functools
+import time
 
 from config import ALLOWED_START_HOUR, ALLOWED_END_HOUR
 
@@ -16,27 +17,43 @@ def is_blocking_active() -> bool:
     Returns:
         bool: True if sites should be blocked, False if allowed.
     """
-    current_hour = datetime.now().hour
-    
-    if ALLOWED_START_HOUR < ALLOWED_END_HOUR:
+    return (_BLOCK_MASK >> time.localtime().tm_hour) & 1 == 1
+
+
+def _blocking_active_for(current_hour: int, start_hour: int, end_hour: int) -> bool:
+    """Blocking state for an hour and window."""
+    if start_hour < end_hour:
         # Same-day window (e.g., 20-22)
-        in_allowed_window = ALLOWED_START_HOUR <= current_hour < ALLOWED_END_HOUR
+        in_allowed_window = start_hour <= current_hour < end_hour
     else:
         # Overnight window (e.g., 23-01)
-        in_allowed_window = current_hour >= ALLOWED_START_HOUR or current_hour < ALLOWED_END_HOUR
+        in_allowed_window = current_hour >= start_hour or current_hour < end_hour
     
     return not in_allowed_window
 
 
+# Bit h is set when blocking is active during hour h
+_BLOCK_MASK = sum(
+    1 << hour
+    for hour in range(24)
+    if _blocking_active_for(hour, ALLOWED_START_HOUR, ALLOWED_END_HOUR)
+)
+
+
 def get_status_message() -> str:
     """Get a human-readable status message about blocking state."""
-    current_hour = datetime.now().hour
-    is_active = is_blocking_active()
+    return _status_message_for(time.localtime().tm_hour, ALLOWED_START_HOUR, ALLOWED_END_HOUR)
+
+
+@functools.lru_cache(maxsize=1)
+def _status_message_for(current_hour: int, start_hour: int, end_hour: int) -> str:
+    """Status message for an hour and window; rebuilt once per hour."""
+    is_active = _blocking_active_for(current_hour, start_hour, end_hour)
     
-    if ALLOWED_START_HOUR < ALLOWED_END_HOUR:
-        window_str = f"{ALLOWED_START_HOUR:02d}:00 - {ALLOWED_END_HOUR:02d}:00"
+    if start_hour < end_hour:
+        window_str = f"{start_hour:02d}:00 - {end_hour:02d}:00"
     else:
-        window_str = f"{ALLOWED_START_HOUR:02d}:00 - {ALLOWED_END_HOUR:02d}:00 (overnight)"
+        window_str = f"{start_hour:02d}:00 - {end_hour:02d}:00 (overnight)"
     
     if is_active:
         return (
@@ -0,0 +1,40 @@
+"""Short-lived status caching shared by the platform installers."""
+
+import functools
+import time
+from typing import Callable
+
+# Status checks are cached for this many seconds so polling UIs don't
+# query launchd or the Task Scheduler on every call
+STATUS_CACHE_SECONDS = 2
+
+
+def status_bucket() -> int:
+    """Get the current status cache time bucket."""
+    return int(time.monotonic() // STATUS_CACHE_SECONDS)
+
+
+def invalidates_status(*caches) -> Callable:
+    """
+    Build a decorator that clears the given status caches before and after
+    a call that changes the status.
+
+    Each cache is an lru_cache-wrapped function keyed by status_bucket().
+    """
+
+    def clear() -> None:
+        for cache in caches:
+            cache.cache_clear()
+
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            clear()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                clear()
+
+        return wrapper
+
+    return decorator
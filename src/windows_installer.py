@@ -1,13 +1,91 @@
 """Windows Task Scheduler installer for Focus Blocker."""
 
 import ctypes
+import functools
+import os
+import shutil
 import subprocess
 import sys
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
+from typing import Callable, Optional
 
-TASK_NAME = "FocusBlocker"
+from status_cache import invalidates_status, status_bucket
+
+# pywin32 lets us talk to WMI in-process instead of spawning PowerShell
+try:
+    import pythoncom
+    import win32com.client
+except ImportError:
+    win32com = None
+
+HAS_WIN32COM = win32com is not None
 
+try:
+    import winreg
+except ImportError:
+    winreg = None
 
+TCPIP_INTERFACES_KEY = r"SYSTEM\CurrentControlSet\Services\Tcpip\Parameters\Interfaces"
+
+TASK_NAME = "FocusBlocker"
+
+# Prefer PATH, falling back to System32 when PATH is stripped
+_SYSTEM32 = os.path.join(os.environ.get("SystemRoot", r"C:\Windows"), "System32")
+SCHTASKS = shutil.which("schtasks") or os.path.join(_SYSTEM32, "schtasks.exe")
+NETSH = shutil.which("netsh") or os.path.join(_SYSTEM32, "netsh.exe")
+POWERSHELL = shutil.which("powershell") or os.path.join(
+    _SYSTEM32, "WindowsPowerShell", "v1.0", "powershell.exe"
+)
+
+# Keep child processes from allocating (and flashing) a console window
+CREATE_NO_WINDOW = getattr(subprocess, "CREATE_NO_WINDOW", 0)
+
+# Task Scheduler 2.0 constants (taskschd.h)
+TASK_CREATE_OR_UPDATE = 6
+TASK_LOGON_SERVICE_ACCOUNT = 5
+TASK_STATE_RUNNING = 4
+
+# Adapter names used when the adapter list can't be enumerated
+DEFAULT_ADAPTERS = ("Ethernet", "Wi-Fi")
+
+FILE_ATTRIBUTE_TEMPORARY = 0x100
+
+# iphlpapi constants (iptypes.h / ipifcons.h)
+GAA_FLAG_SKIP_ADDRESSES = 0x0001 | 0x0002 | 0x0004 | 0x0008
+ERROR_BUFFER_OVERFLOW = 111
+IF_TYPE_SOFTWARE_LOOPBACK = 24
+IF_TYPE_TUNNEL = 131
+IF_OPER_STATUS_UP = 1
+
+
+class _IpAdapterAddresses(ctypes.Structure):
+    """Leading fields of IP_ADAPTER_ADDRESSES; only ever read through a pointer."""
+
+
+_IpAdapterAddresses._fields_ = [
+    ("Length", ctypes.c_ulong),
+    ("IfIndex", ctypes.c_ulong),
+    ("Next", ctypes.POINTER(_IpAdapterAddresses)),
+    ("AdapterName", ctypes.c_char_p),
+    ("FirstUnicastAddress", ctypes.c_void_p),
+    ("FirstAnycastAddress", ctypes.c_void_p),
+    ("FirstMulticastAddress", ctypes.c_void_p),
+    ("FirstDnsServerAddress", ctypes.c_void_p),
+    ("DnsSuffix", ctypes.c_wchar_p),
+    ("Description", ctypes.c_wchar_p),
+    ("FriendlyName", ctypes.c_wchar_p),
+    ("PhysicalAddress", ctypes.c_ubyte * 8),
+    ("PhysicalAddressLength", ctypes.c_ulong),
+    ("Flags", ctypes.c_ulong),
+    ("Mtu", ctypes.c_ulong),
+    ("IfType", ctypes.c_ulong),
+    ("OperStatus", ctypes.c_int),
+]
+
+
+@functools.lru_cache(maxsize=1)
 def is_admin() -> bool:
     """Check if running with Administrator privileges."""
     try:
@@ -16,23 +94,38 @@ def is_admin() -> bool:
         return False
 
 
+def _connect_task_folder():
+    """Connect to the Task Scheduler root folder over COM; None if unavailable."""
+    if not HAS_WIN32COM:
+        return None
+    try:
+        service = win32com.client.Dispatch("Schedule.Service")
+        service.Connect()
+        return service.GetFolder("\\")
+    except Exception:
+        return None
+
+
+def _get_registered_task(folder):
+    """Get our task from a Task Scheduler folder, or None if it isn't registered."""
+    try:
+        return folder.GetTask(TASK_NAME)
+    except Exception:
+        return None
+
+
 def get_python_path() -> str:
     """Get the full path to the current Python interpreter."""
     return sys.executable
 
 
+@functools.lru_cache(maxsize=1)
 def get_project_path() -> Path:
     """Get the project root directory (where main.py lives)."""
     return Path(__file__).parent.resolve()
 
 
-def create_task_xml() -> str:
-    """Generate the Task Scheduler XML content."""
-    python_path = get_python_path()
-    project_path = get_project_path()
-    main_script = project_path / "main.py"
-
-    return f"""<?xml version="1.0" encoding="UTF-16"?>
+_TASK_XML_TEMPLATE = """<?xml version="1.0" encoding="UTF-16"?>
 <Task version="1.4" xmlns="http://schemas.microsoft.com/windows/2004/02/mit/task">
   <RegistrationInfo>
     <Description>Focus Blocker DNS Server - Blocks distracting websites</Description>
@@ -80,147 +173,435 @@ def create_task_xml() -> str:
 """
 
 
-def disable_ipv6() -> None:
-    """Disable IPv6 to prevent DNS bypass."""
-    print("Disabling IPv6 to prevent DNS bypass...")
-    subprocess.run(
-        ["powershell", "-Command", "Disable-NetAdapterBinding -Name 'Ethernet' -ComponentID ms_tcpip6"],
-        capture_output=True
+@functools.lru_cache(maxsize=1)
+def create_task_xml() -> str:
+    """Generate the Task Scheduler XML content."""
+    project_path = get_project_path()
+    return _TASK_XML_TEMPLATE.format_map({
+        "python_path": get_python_path(),
+        "main_script": project_path / "main.py",
+        "project_path": project_path,
+    })
+
+
+@functools.lru_cache(maxsize=1)
+def _task_xml_bytes() -> bytes:
+    """The task XML encoded as UTF-16 (with BOM) for the schtasks file."""
+    return create_task_xml().encode("utf-16")
+
+
+def _run_concurrently(commands: list[list[str]]) -> None:
+    """Run independent commands at once (output discarded)."""
+
+    def run(cmd: list[str]) -> None:
+        subprocess.run(cmd, capture_output=True, creationflags=CREATE_NO_WINDOW)
+
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        list(executor.map(run, commands))
+
+
+def get_network_adapters(up_only: bool = True) -> tuple[str, ...]:
+    """
+    Get network adapter friendly names (localized names included).
+
+    Loopback and tunnel interfaces are skipped. Falls back to DEFAULT_ADAPTERS
+    if GetAdaptersAddresses isn't available.
+
+    Args:
+        up_only: Only include adapters that are currently up (default: True)
+    """
+    try:
+        get_adapters = ctypes.windll.iphlpapi.GetAdaptersAddresses
+    except (AttributeError, OSError):
+        return DEFAULT_ADAPTERS
+
+    size = ctypes.c_ulong(15000)
+    while True:
+        buffer = ctypes.create_string_buffer(size.value)
+        result = get_adapters(
+            0, GAA_FLAG_SKIP_ADDRESSES, None, buffer, ctypes.byref(size)
+        )
+        if result != ERROR_BUFFER_OVERFLOW:
+            break
+    if result != 0:
+        return DEFAULT_ADAPTERS
+
+    names = []
+    adapter = ctypes.cast(buffer, ctypes.POINTER(_IpAdapterAddresses))
+    while adapter:
+        entry = adapter.contents
+        is_up = entry.OperStatus == IF_OPER_STATUS_UP
+        if (is_up or not up_only) and entry.IfType not in (
+            IF_TYPE_SOFTWARE_LOOPBACK,
+            IF_TYPE_TUNNEL,
+        ):
+            names.append(entry.FriendlyName)
+        adapter = entry.Next
+    return tuple(names) or DEFAULT_ADAPTERS
+
+
+def _with_com(func: Callable[[], None]) -> None:
+    """Call func with COM initialized, for use on worker threads."""
+    if HAS_WIN32COM:
+        pythoncom.CoInitialize()
+    try:
+        func()
+    finally:
+        if HAS_WIN32COM:
+            pythoncom.CoUninitialize()
+
+
+def _set_ipv6_binding_wmi(enabled: bool, adapters: tuple[str, ...]) -> bool:
+    """Toggle the ms_tcpip6 binding through WMI; False if WMI is unavailable."""
+    if not HAS_WIN32COM:
+        return False
+
+    names = " OR ".join(
+        "Name = '{}'".format(name.replace("\\", "\\\\").replace("'", "\\'"))
+        for name in adapters
     )
+    try:
+        cim = win32com.client.GetObject("winmgmts://./root/StandardCimv2")
+        bindings = cim.ExecQuery(
+            "SELECT * FROM MSFT_NetAdapterBindingSettingData "
+            f"WHERE ComponentID = 'ms_tcpip6' AND ({names}) "
+            # Only bindings not already in the target state
+            f"AND Enabled = {not enabled}"
+        )
+        for binding in bindings:
+            binding.ExecMethod_("Enable" if enabled else "Disable")
+    except Exception:
+        return False
+    return True
+
+
+def _reset_dns_registry() -> Optional[tuple[str, ...]]:
+    """
+    Clear static DNS servers in the registry and tell the DHCP client.
+
+    Returns the GUIDs of interfaces the DHCP client couldn't be notified
+    about, or None if the registry or dhcpcsvc.dll isn't available.
+    """
+    if winreg is None:
+        return None
+
+    try:
+        notify = ctypes.windll.dhcpcsvc.DhcpNotifyConfigChange
+        interfaces = winreg.OpenKey(winreg.HKEY_LOCAL_MACHINE, TCPIP_INTERFACES_KEY)
+    except (AttributeError, OSError):
+        return None
+
+    failed = []
+    with interfaces:
+        index = 0
+        while True:
+            try:
+                guid = winreg.EnumKey(interfaces, index)
+            except OSError:
+                break  # No more interfaces
+            index += 1
+
+            try:
+                with winreg.OpenKey(
+                    interfaces, guid, 0, winreg.KEY_QUERY_VALUE | winreg.KEY_SET_VALUE
+                ) as key:
+                    name_server, _ = winreg.QueryValueEx(key, "NameServer")
+                    if not name_server:
+                        continue  # Already using DHCP-provided DNS
+                    winreg.SetValueEx(key, "NameServer", 0, winreg.REG_SZ, "")
+            except OSError:
+                continue
+            # Make the DHCP client pick up the change without a restart. No
+            # address is changing, so IsNewIpAddress is False and the index,
+            # address and mask are unused; DhcpAction 0 (IgnoreFlag) leaves
+            # the adapter's DHCP setting as it is.
+            if notify(None, guid, False, 0, 0, 0, 0) != 0:
+                failed.append(guid)
+    return tuple(failed)
+
+
+def _reset_dns_wmi(setting_ids: Optional[tuple[str, ...]] = None) -> bool:
+    """
+    Reset IP-enabled adapters' DNS to DHCP through WMI; False if unavailable.
+
+    Only the adapters with the given interface GUIDs are reset, or all of
+    them if setting_ids is None.
+    """
+    if not HAS_WIN32COM:
+        return False
+
+    query = "SELECT * FROM Win32_NetworkAdapterConfiguration WHERE IPEnabled = True"
+    if setting_ids is not None:
+        query += " AND ({})".format(
+            " OR ".join(f"SettingID = '{guid}'" for guid in setting_ids)
+        )
+    try:
+        cimv2 = win32com.client.GetObject("winmgmts://./root/cimv2")
+        configs = cimv2.ExecQuery(query)
+        for config in configs:
+            # No search order argument means "obtain DNS servers from DHCP"
+            config.ExecMethod_("SetDNSServerSearchOrder")
+    except Exception:
+        return False
+    return True
+
+
+def _set_ipv6_binding_powershell(verb: str, adapters: tuple[str, ...]) -> None:
+    """Run Enable/Disable-NetAdapterBinding for every adapter in one PowerShell."""
+    names = ",".join("'{}'".format(name.replace("'", "''")) for name in adapters)
     subprocess.run(
-        ["powershell", "-Command", "Disable-NetAdapterBinding -Name 'Wi-Fi' -ComponentID ms_tcpip6"],
-        capture_output=True
+        [
+            POWERSHELL,
+            "-NoProfile",
+            "-Command",
+            # Only pipe bindings that aren't already in the target state
+            f"Get-NetAdapterBinding -Name {names} -ComponentID ms_tcpip6 "
+            "-ErrorAction SilentlyContinue | "
+            f"Where-Object Enabled -ne ${verb == 'Enable'} | "
+            f"{verb}-NetAdapterBinding",
+        ],
+        capture_output=True,
+        creationflags=CREATE_NO_WINDOW
     )
 
 
+def reset_dns() -> None:
+    """Reset DNS settings to automatic (DHCP)."""
+    print("Resetting DNS settings to automatic...")
+    failed = _reset_dns_registry()
+    if failed == ():
+        return
+    # Reset through WMI only the adapters the DHCP client missed, or every
+    # adapter if the registry wasn't usable
+    if not _reset_dns_wmi(failed):
+        _run_concurrently([
+            [NETSH, "interface", "ip", "set", "dns", name, "dhcp"]
+            # Include adapters that are down so they don't come back up
+            # pointing at 127.0.0.1
+            for name in get_network_adapters(up_only=False)
+        ])
+
+
+def disable_ipv6() -> None:
+    """Disable IPv6 to prevent DNS bypass."""
+    print("Disabling IPv6 to prevent DNS bypass...")
+    # Include adapters that are down so IPv6 stays off when they come up
+    adapters = get_network_adapters(up_only=False)
+    if _set_ipv6_binding_wmi(False, adapters):
+        return
+    _set_ipv6_binding_powershell("Disable", adapters)
+
+
 def enable_ipv6() -> None:
     """Re-enable IPv6."""
     print("Re-enabling IPv6...")
-    subprocess.run(
-        ["powershell", "-Command", "Enable-NetAdapterBinding -Name 'Ethernet' -ComponentID ms_tcpip6"],
-        capture_output=True
-    )
-    subprocess.run(
-        ["powershell", "-Command", "Enable-NetAdapterBinding -Name 'Wi-Fi' -ComponentID ms_tcpip6"],
-        capture_output=True
-    )
+    # Include adapters that have gone down since they were disabled
+    adapters = get_network_adapters(up_only=False)
+    if _set_ipv6_binding_wmi(True, adapters):
+        return
+    _set_ipv6_binding_powershell("Enable", adapters)
 
 
-def install() -> bool:
-    """Install the Windows Task Scheduler task."""
-    if not is_admin():
-        print("Error: Installation requires Administrator privileges.")
-        return False
+@functools.lru_cache(maxsize=1)
+def _get_status_cached(bucket: int) -> dict:
+    installed, running = _query_task()
+    return {
+        "installed": installed,
+        "running": running,
+        "task_name": TASK_NAME,
+    }
 
-    # Remove existing task if present
-    subprocess.run(
-        ["schtasks", "/Delete", "/TN", TASK_NAME, "/F"],
-        capture_output=True
-    )
 
-    # Disable IPv6 to prevent DNS bypass
-    disable_ipv6()
+_invalidates_status = invalidates_status(_get_status_cached)
 
-    # Create temporary XML file
-    project_path = get_project_path()
-    xml_path = project_path / "focus_task.xml"
+
+def _mark_temporary(path: str) -> None:
+    """
+    Set FILE_ATTRIBUTE_TEMPORARY so the file's pages stay in the cache.
+
+    The cache manager then avoids flushing it to disk unless memory runs low.
+    """
+    try:
+        ctypes.windll.kernel32.SetFileAttributesW(path, FILE_ATTRIBUTE_TEMPORARY)
+    except (AttributeError, OSError):
+        pass
+
+
+def _create_task_schtasks() -> bool:
+    """Create and start the task with schtasks.exe (needs a temporary XML file)."""
+    # Create temporary XML file in %TEMP% rather than the project directory.
+    # It must be closed (delete=False) before schtasks can open it.
+    with tempfile.NamedTemporaryFile(suffix=".xml", delete=False) as xml_file:
+        xml_path = Path(xml_file.name)
+        _mark_temporary(xml_file.name)
+        xml_file.write(_task_xml_bytes())
     
     try:
-        xml_path.write_text(create_task_xml(), encoding="utf-16")
-        
         # Create the task
         result = subprocess.run(
-            ["schtasks", "/Create", "/TN", TASK_NAME, "/XML", str(xml_path)],
+            [SCHTASKS, "/Create", "/TN", TASK_NAME, "/XML", str(xml_path)],
             capture_output=True,
-            text=True
+            creationflags=CREATE_NO_WINDOW
         )
         
         if result.returncode != 0:
-            print(f"Error creating task: {result.stderr}")
+            print(f"Error creating task: {result.stderr.decode(errors='replace')}")
             return False
         
-        # Start the task immediately
-        subprocess.run(
-            ["schtasks", "/Run", "/TN", TASK_NAME],
-            capture_output=True
+        # Start the task immediately; nothing waits on schtasks /Run
+        subprocess.Popen(
+            [SCHTASKS, "/Run", "/TN", TASK_NAME],
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+            creationflags=CREATE_NO_WINDOW
         )
-        
-        print("Focus Blocker installed successfully!")
-        print("\nThe DNS server will start automatically on boot.")
         return True
         
     finally:
         # Clean up XML file
-        if xml_path.exists():
-            xml_path.unlink()
+        xml_path.unlink(missing_ok=True)
 
 
+@_invalidates_status
+def install() -> bool:
+    """Install the Windows Task Scheduler task."""
+    if not is_admin():
+        print("Error: Installation requires Administrator privileges.")
+        return False
+
+    # Disable IPv6 to prevent DNS bypass. It doesn't depend on the task,
+    # so it runs on a worker while the old task is removed.
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        ipv6 = executor.submit(_with_com, disable_ipv6)
+
+        # Remove existing task if present
+        folder = _connect_task_folder()
+        if folder is not None:
+            try:
+                folder.DeleteTask(TASK_NAME, 0)
+            except Exception:
+                pass  # Not registered
+        else:
+            subprocess.run(
+                [SCHTASKS, "/Delete", "/TN", TASK_NAME, "/F"],
+                capture_output=True,
+                creationflags=CREATE_NO_WINDOW
+            )
+    ipv6.result()
+
+    if folder is not None:
+        # RegisterTask takes the XML definition directly, so no temp file
+        try:
+            task = folder.RegisterTask(
+                TASK_NAME,
+                create_task_xml(),
+                TASK_CREATE_OR_UPDATE,
+                None,
+                None,
+                TASK_LOGON_SERVICE_ACCOUNT,
+            )
+        except Exception as e:
+            print(f"Error creating task: {e}")
+            return False
+
+        # Start the task immediately; it still starts on boot if this fails
+        try:
+            task.Run(None)
+        except Exception:
+            pass
+    elif not _create_task_schtasks():
+        return False
+
+    print("Focus Blocker installed successfully!")
+    print("\nThe DNS server will start automatically on boot.")
+    return True
+
+
+@_invalidates_status
 def uninstall() -> bool:
     """Uninstall the Windows Task Scheduler task."""
     if not is_admin():
         print("Error: Uninstallation requires Administrator privileges.")
         return False
 
-    # Stop the task
-    subprocess.run(
-        ["schtasks", "/End", "/TN", TASK_NAME],
-        capture_output=True
-    )
-
-    # Delete the task
-    result = subprocess.run(
-        ["schtasks", "/Delete", "/TN", TASK_NAME, "/F"],
-        capture_output=True,
-        text=True
-    )
+    folder = _connect_task_folder()
+    if folder is not None:
+        task = _get_registered_task(folder)
+        if task is not None:
+            # Stop the task; it may not be running
+            try:
+                task.Stop(0)
+            except Exception:
+                pass
+
+            # Delete the task
+            try:
+                folder.DeleteTask(TASK_NAME, 0)
+            except Exception as e:
+                print(f"Error removing task: {e}")
+                return False
+    else:
+        # Stop the task
+        subprocess.run(
+            [SCHTASKS, "/End", "/TN", TASK_NAME],
+            capture_output=True,
+            creationflags=CREATE_NO_WINDOW
+        )
 
-    if result.returncode != 0 and "cannot find" not in result.stderr.lower():
-        print(f"Error removing task: {result.stderr}")
-        return False
+        # Delete the task
+        result = subprocess.run(
+            [SCHTASKS, "/Delete", "/TN", TASK_NAME, "/F"],
+            capture_output=True,
+            creationflags=CREATE_NO_WINDOW
+        )
 
-    # Reset DNS settings
-    print("Resetting DNS settings to automatic...")
-    subprocess.run(
-        ["netsh", "interface", "ip", "set", "dns", "Wi-Fi", "dhcp"],
-        capture_output=True
-    )
-    subprocess.run(
-        ["netsh", "interface", "ip", "set", "dns", "Ethernet", "dhcp"],
-        capture_output=True
-    )
+        if result.returncode != 0 and b"cannot find" not in result.stderr.lower():
+            print(f"Error removing task: {result.stderr.decode(errors='replace')}")
+            return False
 
-    # Re-enable IPv6
-    enable_ipv6()
+    # Reset DNS settings and re-enable IPv6; they are independent
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        done = [
+            executor.submit(_with_com, reset_dns),
+            executor.submit(_with_com, enable_ipv6),
+        ]
+    for future in done:
+        future.result()
 
     print("Focus Blocker uninstalled successfully.")
     return True
 
 
-def is_installed() -> bool:
-    """Check if Focus Blocker is installed as a scheduled task."""
+def _query_task() -> tuple[bool, bool]:
+    """Look up the task once; returns (installed, running)."""
+    folder = _connect_task_folder()
+    if folder is not None:
+        task = _get_registered_task(folder)
+        if task is None:
+            return False, False
+        return True, task.State == TASK_STATE_RUNNING
+
     result = subprocess.run(
-        ["schtasks", "/Query", "/TN", TASK_NAME],
-        capture_output=True
+        [SCHTASKS, "/Query", "/TN", TASK_NAME, "/V", "/FO", "CSV"],
+        capture_output=True,
+        creationflags=CREATE_NO_WINDOW
     )
-    return result.returncode == 0
+    if result.returncode != 0:
+        return False, False
+    # Every CSV field is quoted, so this only matches a whole "Running" value
+    return True, b'"Running"' in result.stdout
+
+
+def is_installed() -> bool:
+    """Check if Focus Blocker is installed as a scheduled task."""
+    return _query_task()[0]
 
 
 def is_running() -> bool:
     """Check if the Focus Blocker task is running."""
-    result = subprocess.run(
-        ["schtasks", "/Query", "/TN", TASK_NAME, "/V", "/FO", "LIST"],
-        capture_output=True,
-        text=True
-    )
-    if result.returncode != 0:
-        return False
-    return "Running" in result.stdout
+    return _query_task()[1]
 
 
 def get_status() -> dict:
-    """Get the current status of Focus Blocker."""
-    return {
-        "installed": is_installed(),
-        "running": is_running(),
-        "task_name": TASK_NAME,
-    }
+    """Get the current status of Focus Blocker (briefly cached)."""
+    return dict(_get_status_cached(status_bucket()))
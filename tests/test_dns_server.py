@@ -0,0 +1,98 @@
+"""Tests for upstream forwarding in the threaded DNS server."""
+
+import os
+import socket
+import sys
+import threading
+import time
+import unittest
+from unittest import mock
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from dnslib import A, DNSRecord, RR
+
+import dns_server
+
+
+def _serve_upstream(sock: socket.socket, good: bool) -> None:
+    """Answer queries on sock, with a valid reply or a malformed one."""
+    while True:
+        try:
+            data, addr = sock.recvfrom(4096)
+        except OSError:
+            return
+        if not good:
+            # Matching transaction ID but a header dnslib can't parse past
+            sock.sendto(data[:2] + b"\x81\x80\xff\xff", addr)
+            continue
+        request = DNSRecord.parse(data)
+        reply = request.reply()
+        reply.add_answer(RR(request.q.qname, rdata=A("192.0.2.1"), ttl=30))
+        sock.sendto(reply.pack(), addr)
+
+
+class UpstreamFallbackTest(unittest.TestCase):
+    def setUp(self):
+        # Bad and good upstreams share a port on different loopback addresses
+        self.bad = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self.bad.bind(("127.0.0.2", 0))
+        port = self.bad.getsockname()[1]
+        self.good = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self.good.bind(("127.0.0.1", port))
+        for sock, good in ((self.bad, False), (self.good, True)):
+            threading.Thread(
+                target=_serve_upstream, args=(sock, good), daemon=True
+            ).start()
+
+        patcher = mock.patch.object(dns_server, "UPSTREAM_DNS_PORT", port)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+        self.server = dns_server.FocusBlockerDNS(host="127.0.0.1", port=0)
+        self.server._get_upstream_dns_servers = lambda: ["127.0.0.2", "127.0.0.1"]
+        self.thread = threading.Thread(target=self.server.start, daemon=True)
+        self.thread.start()
+        while self.server.socket is None or not self.server.running:
+            time.sleep(0.01)
+
+    def tearDown(self):
+        self.server.stop()
+        self.thread.join(5)
+        self.bad.close()
+        self.good.close()
+
+    def test_malformed_reply_falls_back_to_next_upstream(self):
+        client = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self.addCleanup(client.close)
+        client.settimeout(2)
+
+        request = DNSRecord.question("example.com")
+        client.sendto(request.pack(), self.server.socket.getsockname())
+        reply = DNSRecord.parse(client.recv(4096))
+
+        self.assertEqual(reply.header.id, request.header.id)
+        self.assertEqual(reply.header.rcode, 0)
+        self.assertEqual([str(rr.rdata) for rr in reply.rr], ["192.0.2.1"])
+
+
+class ResponseCacheTest(unittest.TestCase):
+    def setUp(self):
+        self.server = dns_server.FocusBlockerDNS()
+        self.request = DNSRecord.question("example.com")
+        self.reply = self.request.reply()
+        self.reply.add_answer(
+            RR(self.request.q.qname, rdata=A("192.0.2.1"), ttl=30)
+        )
+
+    def test_truncated_reply_is_not_cached(self):
+        self.reply.header.tc = 1
+        key = (b"example.com", 1, 1)
+        self.server._cache_response(key, self.reply)
+        self.assertIsNone(
+            self.server._get_cached_response(key, self.request.pack())
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()